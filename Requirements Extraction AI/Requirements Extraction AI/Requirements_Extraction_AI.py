@@ -1,28 +1,160 @@
 import os
+import zipfile
+from collections import deque
+from xml.etree.ElementTree import iterparse
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import pdfplumber
 import docx
-from PIL import Image
+from PIL import Image, ImageOps, ImageSequence
 import pytesseract
 
-def extract_from_pdf(file_path):
-    """Extract text from PDF file."""
-    text = ""
+OCR_DPI = 300
+OCR_WORKERS = os.cpu_count() or 1
+OCR_THRESHOLD = 160
+OCR_PAGE_PIXELS = 2550 * 3300       # letter page at OCR_DPI; upscaling stops here
+OCR_MAX_PIXELS = 40_000_000         # anything larger is scaled down to this
+PARALLEL_MIN_PAGES = 200
+PAGES_PER_RANGE = 64
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+def ocr_scale(width, height, dpi=None):
+    """Scale factor toward OCR_DPI, bounded by the OCR_PAGE_PIXELS and OCR_MAX_PIXELS limits."""
+    pixels = width * height
+    scale = OCR_DPI / float(dpi) if dpi else 1.0
+    if scale > 1.0:
+        # Photos and screenshots often claim 72 or 96 dpi while already
+        # having more pixels than a 300 dpi page; only small images grow
+        scale = min(scale, max(1.0, (OCR_PAGE_PIXELS / pixels) ** 0.5))
+    return min(scale, (OCR_MAX_PIXELS / pixels) ** 0.5)
+
+def prepare_for_ocr(img, dpi=None):
+    """Grayscale, rescale toward OCR_DPI and binarize a page image for tesseract."""
+    img = ImageOps.autocontrast(ImageOps.grayscale(img))
+    scale = ocr_scale(img.width, img.height, dpi)
+    if abs(scale - 1.0) > 0.1:
+        size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+        img = img.resize(size, Image.LANCZOS)
+    return img.point(lambda p: 255 if p > OCR_THRESHOLD else 0)
+
+def ocr_image(img, dpi=None):
+    """Run tesseract on a single prepared page image."""
+    return pytesseract.image_to_string(prepare_for_ocr(img, dpi))
+
+def extract_pdf_range(file_path, start, stop):
+    """Extract text from pages [start, stop) of a PDF in this process, OCR included."""
+    os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+    texts = []
+    with pdfplumber.open(file_path) as pdf:
+        for page in pdf.pages[start:stop]:
+            text = page.extract_text() or ""
+            if not text.strip() and page.images:
+                text = ocr_image(page.to_image(resolution=OCR_DPI).original, OCR_DPI)
+            texts.append(text)
+            page.flush_cache()
+    return texts
+
+def extract_from_pdf(file_path, workers=OCR_WORKERS):
+    """Extract text from PDF file, OCR-ing scanned pages that have no text layer."""
     with pdfplumber.open(file_path) as pdf:
-        for page in pdf.pages:
-            text += page.extract_text() or ""
-    return text
+        page_count = len(pdf.pages)
+    if workers > 1 and page_count >= PARALLEL_MIN_PAGES:
+        # Large manuals are split into page ranges, one process each, and
+        # reassembled in page order
+        starts = range(0, page_count, PAGES_PER_RANGE)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            ranges = pool.map(extract_pdf_range, [file_path] * len(starts), starts,
+                              [s + PAGES_PER_RANGE for s in starts])
+            return "".join(text for texts in ranges for text in texts)
+
+    os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+    texts = []
+    in_flight = deque()
+    with pdfplumber.open(file_path) as pdf, ThreadPoolExecutor(max_workers=workers) as pool:
+        for i, page in enumerate(pdf.pages):
+            text = page.extract_text() or ""
+            if not text.strip() and page.images:
+                # Rasterize straight at OCR resolution; only a few pages are
+                # held in memory at once
+                image = page.to_image(resolution=OCR_DPI).original
+                in_flight.append((i, pool.submit(ocr_image, image, OCR_DPI)))
+                if len(in_flight) >= 2 * workers:
+                    j, future = in_flight.popleft()
+                    texts[j] = future.result()
+            texts.append(text)
+        for j, future in in_flight:
+            texts[j] = future.result()
+    return "".join(texts)
+
+def paragraph_text(p):
+    """Join the runs of a w:p element, keeping tabs and line breaks."""
+    parts = []
+    for node in p.iter():
+        if node.tag == W + "t":
+            parts.append(node.text or "")
+        elif node.tag == W + "tab":
+            parts.append("\t")
+        elif node.tag in (W + "br", W + "cr"):
+            parts.append("\n")
+    return "".join(parts)
+
+def iter_docx_text(file_path):
+    """Yield body paragraph and table-cell text from a .docx, streaming word/document.xml."""
+    cells = []
+    parents = []
+    with zipfile.ZipFile(file_path) as archive, archive.open("word/document.xml") as xml:
+        for event, elem in iterparse(xml, events=("start", "end")):
+            if event == "start":
+                parents.append(elem)
+                if elem.tag == W + "tc":
+                    cells.append([])
+                continue
+            parents.pop()
+            if elem.tag == W + "p":
+                text = paragraph_text(elem)
+                if cells:
+                    cells[-1].append(text)
+                else:
+                    yield text
+            elif elem.tag == W + "tc":
+                text = "\n".join(cells.pop())
+                if cells:
+                    # A nested table's text belongs inside its enclosing cell
+                    cells[-1].append(text)
+                else:
+                    yield text
+            elif elem.tag not in (W + "tr", W + "tbl"):
+                continue
+            # Finished elements are detached from their parent, so neither
+            # they nor an ever-growing w:body stay in memory
+            if parents:
+                parents[-1].remove(elem)
 
 def extract_from_docx(file_path):
-    """Extract text from Word (.docx) file."""
-    doc = docx.Document(file_path)
-    text = "\n".join([para.text for para in doc.paragraphs])
-    return text
-
-def extract_from_image(file_path):
-    """Extract text from image using OCR."""
-    img = Image.open(file_path)
-    text = pytesseract.image_to_string(img)
-    return text
+    """Extract text from Word (.docx) file, table cells included."""
+    try:
+        return "\n".join(iter_docx_text(file_path))
+    except KeyError:
+        # No word/document.xml at the usual path; let python-docx find the part
+        doc = docx.Document(file_path)
+        return "\n".join(para.text for para in doc.paragraphs)
+
+def extract_from_image(file_path, workers=OCR_WORKERS):
+    """Extract text from every frame of an image (e.g. multi-page TIFF) using OCR."""
+    # Each tesseract call is its own process, so threads run frames in
+    # parallel; one OpenMP thread each keeps them from oversubscribing cores.
+    os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+    texts = []
+    in_flight = deque()
+    with Image.open(file_path) as img, ThreadPoolExecutor(max_workers=workers) as pool:
+        dpi = img.info.get("dpi", (None,))[0]
+        for frame in ImageSequence.Iterator(img):
+            # Only a few decoded frames are held in memory at once
+            in_flight.append(pool.submit(ocr_image, frame.copy(), dpi))
+            if len(in_flight) >= 2 * workers:
+                texts.append(in_flight.popleft().result())
+        texts.extend(future.result() for future in in_flight)
+    return "\n".join(texts)
 
 def extract_text(file_path):
     """Main function to extract text from different document types."""